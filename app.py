@@ -1,7 +1,6 @@
 # app.py — unified, session-aware, fully cleaned version
 
 import os
-import yaml
 from flask import Flask, jsonify, request, send_file, render_template
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
@@ -41,6 +40,7 @@ from assistant_api import (
     api_story_flow_improve
 )
 from tiktok_template import get_config_path
+from yaml_utils import yaml_safe_load, yaml_safe_dump
 from s3_config import s3, S3_BUCKET_NAME, RAW_PREFIX
 import threading
 
@@ -352,7 +352,7 @@ def api_music():
     cfg = {}
     if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f) or {}
+            cfg = yaml_safe_load(f) or {}
 
     r = cfg.setdefault("render", {})
     r["music_enabled"] = enabled
@@ -360,7 +360,7 @@ def api_music():
     r["music_volume"] = volume
 
     with open(config_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(cfg, f, sort_keys=False)
+        yaml_safe_dump(cfg, f, sort_keys=False)
 
 
     return jsonify({"status": "ok"})
@@ -6,11 +6,11 @@ import glob
 import logging
 import re
 from typing import Dict, Any, List
-import yaml
 from openai import OpenAI
 from flask import request
 from assistant_log import log_step, log_error, log_success
-from tiktok_template import edit_video, video_folder,get_config_path
+from tiktok_template import edit_video, video_folder,get_config_path, load_config_for_session
+from yaml_utils import yaml_safe_load, yaml_safe_dump
 from s3_config import (
     s3,
     S3_BUCKET_NAME,
@@ -63,13 +63,8 @@ TEXT_MODEL = "gpt-4.1-mini"
 def _load_config(session: str) -> dict:
     """Load the session's config.yml safely."""
     session = sanitize_session(session)
-    config_path = get_config_path(session)
-    if not os.path.exists(config_path):
-        return {}
-
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f) or {}
+        return load_config_for_session(session)
     except Exception:
         return {}
 
@@ -143,7 +138,7 @@ def api_improve_hook(session: str) -> Dict[str, Any]:
         return {"status": "error", "error": "config.yml not found"}
 
     with open(config_path, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
+        cfg = yaml_safe_load(f) or {}
 
     hook = extract_hook_text(cfg)
     new_hook = improve_hook_text(hook)
@@ -153,7 +148,7 @@ def api_improve_hook(session: str) -> Dict[str, Any]:
     cfg["first_clip"]["text"] = new_hook
 
     with open(config_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(cfg, f, sort_keys=False)
+        yaml_safe_dump(cfg, f, sort_keys=False)
 
     # Return new score too
     result = score_hook_text(new_hook)
@@ -265,7 +260,7 @@ def api_story_flow_improve(session: str) -> Dict[str, Any]:
         return {"updated": False, "reason": "config.yml not found"}
 
     with open(config_path, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
+        cfg = yaml_safe_load(f) or {}
 
     # --------------------------------------------------
     # Collect ALL captions AFTER the hook
@@ -350,7 +345,7 @@ def api_story_flow_improve(session: str) -> Dict[str, Any]:
             targets[i]["text"] = new_text
 
         with open(config_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(cfg, f, sort_keys=False)
+            yaml_safe_dump(cfg, f, sort_keys=False)
 
         return {
             "updated": True,
@@ -646,7 +641,7 @@ def api_generate_yaml(session: str = "default") -> Dict[str, Any]:
             )
             yaml_text = (resp.choices[0].message.content or "").strip()
             yaml_text = yaml_text.replace("```yaml", "").replace("```", "").strip()
-            cfg = yaml.safe_load(yaml_text)
+            cfg = yaml_safe_load(yaml_text)
         else:
             msg = "OpenAI key missing"
             log_error("[YAML]", Exception(msg))
@@ -670,7 +665,7 @@ def api_generate_yaml(session: str = "default") -> Dict[str, Any]:
         config_path = get_config_path(session)
 
         with open(config_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(cfg, f, sort_keys=False)
+            yaml_safe_dump(cfg, f, sort_keys=False)
 
         log_success("[YAML]", "Generated and saved config.yml")
         return cfg
@@ -696,7 +691,7 @@ def api_get_config() -> Dict[str, Any]:
         yaml_text = f.read()
 
     try:
-        cfg = yaml.safe_load(yaml_text) or {}
+        cfg = yaml_safe_load(yaml_text) or {}
     except Exception as e:
         log_error("[GET_CONFIG]", e)
         return {"yaml": yaml_text, "config": {}}
@@ -708,7 +703,7 @@ def api_get_config() -> Dict[str, Any]:
 def api_save_yaml(yaml_text: str) -> Dict[str, Any]:
     try:
         # Parse raw user YAML
-        cfg = yaml.safe_load(yaml_text) or {}
+        cfg = yaml_safe_load(yaml_text) or {}
         cfg = sanitize_yaml_filenames(cfg)
 
         session = sanitize_session(request.args.get("session", "default"))
@@ -717,7 +712,7 @@ def api_save_yaml(yaml_text: str) -> Dict[str, Any]:
         # ❗ Write ONLY what the user edited
         # Do NOT merge session overrides here
         with open(config_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(cfg, f, sort_keys=False)
+            yaml_safe_dump(cfg, f, sort_keys=False)
 
         log_success("[SAVE_YAML]", f"config.yml saved for session '{session}'")
         return {"status": "ok"}
@@ -746,7 +741,7 @@ def api_save_captions(text: str, session: str) -> Dict[str, Any]:
         config_path = get_config_path(session)
 
         with open(config_path, "r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f) or {}
+            cfg = yaml_safe_load(f) or {}
 
         # 🔥 Robust block split
         blocks = [
@@ -773,7 +768,7 @@ def api_save_captions(text: str, session: str) -> Dict[str, Any]:
             cfg["last_clip"]["text"] = blocks[idx]
 
         with open(config_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(cfg, f, sort_keys=False)
+            yaml_safe_dump(cfg, f, sort_keys=False)
 
         with open(_CAPTIONS_FILE, "w", encoding="utf-8") as f:
             f.write(text)
@@ -817,7 +812,7 @@ def run_export_task(task_id: str, session: str, optimized: bool):
         # ----------------------------------------------------
         try:
             with open(config_path, "r", encoding="utf-8") as f:
-                cfg = yaml.safe_load(f) or {}
+                cfg = yaml_safe_load(f) or {}
         except Exception as e:
             log_error("[EXPORT][LOAD_CFG]", e)
             export_tasks[task_id]["status"] = "error"
@@ -879,7 +874,7 @@ def api_set_tts(session: str, enabled: bool, voice: str | None) -> Dict[str, Any
     cfg = {}
     if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f) or {}
+            cfg = yaml_safe_load(f) or {}
 
     r = cfg.setdefault("render", {})
     r["tts_enabled"] = bool(enabled)
@@ -888,7 +883,7 @@ def api_set_tts(session: str, enabled: bool, voice: str | None) -> Dict[str, Any
         r["tts_voice"] = voice
 
     with open(config_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(cfg, f, sort_keys=False)
+        yaml_safe_dump(cfg, f, sort_keys=False)
 
     return {"status": "ok", "render": r}
 
@@ -901,7 +896,7 @@ def api_set_cta(session: str, enabled: bool, text: str | None, voiceover: bool |
     cfg = {}
     if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f) or {}
+            cfg = yaml_safe_load(f) or {}
 
     c = cfg.setdefault("cta", {})
     c["enabled"] = bool(enabled)
@@ -921,7 +916,7 @@ def api_set_cta(session: str, enabled: bool, text: str | None, voiceover: bool |
         c.setdefault("duration", 3.0)
 
     with open(config_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(cfg, f, sort_keys=False)
+        yaml_safe_dump(cfg, f, sort_keys=False)
 
     return {"status": "ok", "cta": c}
 
@@ -981,13 +976,13 @@ def api_set_layout(session: str, mode: str) -> Dict[str, Any]:
     cfg = {}
     if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f) or {}
+            cfg = yaml_safe_load(f) or {}
 
     r = cfg.setdefault("render", {})
     r["layout_mode"] = mode
 
     with open(config_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(cfg, f, sort_keys=False)
+        yaml_safe_dump(cfg, f, sort_keys=False)
 
     return {"status": "ok", "layout_mode": mode}
 
@@ -999,14 +994,14 @@ def api_fgscale(session: str, fgscale_mode: str, fgscale: float | None) -> Dict[
     cfg = {}
     if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f) or {}
+            cfg = yaml_safe_load(f) or {}
 
     r = cfg.setdefault("render", {})
     r["fgscale_mode"] = fgscale_mode
     r["fgscale"] = fgscale
 
     with open(config_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(cfg, f, sort_keys=False)
+        yaml_safe_dump(cfg, f, sort_keys=False)
 
     return {"status": "ok", "render": r}
 
@@ -1037,7 +1032,7 @@ def api_chat(message: str, session: str = "default") -> Dict[str, Any]:
             {json.dumps(analyses, indent=2)}
 
             ### CURRENT YAML CONFIG (do NOT modify unless asked)
-            {yaml.safe_dump(cfg, sort_keys=False)}
+            {yaml_safe_dump(cfg, sort_keys=False)}
 
             ### YOUR JOB
             - Answer questions as an expert TikTok travel creator.
@@ -2,6 +2,7 @@
 
 import os
 import boto3
+from botocore.config import Config
 
 # ------------------------------
 # ENV VARS
@@ -31,11 +32,14 @@ if not AWS_ACCESS_KEY_ID or not AWS_SECRET_ACCESS_KEY:
 # ------------------------------
 # S3 CLIENT (shared system-wide)
 # ------------------------------
+# Pool sized for parallel clip prefetch (4 clips x 8 ranged parts);
+# botocore's default of 10 would make extra threads wait for a socket.
 s3 = boto3.client(
     "s3",
     region_name=S3_REGION,
     aws_access_key_id=AWS_ACCESS_KEY_ID,
     aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    config=Config(max_pool_connections=32),
 )
 
 # ------------------------------
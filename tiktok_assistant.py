@@ -12,12 +12,12 @@ import subprocess
 import json
 from typing import Dict, List, Optional
 import re
-import yaml
 from openai import OpenAI
 
 from assistant_log import log_step
 from s3_config import s3, S3_BUCKET_NAME, RAW_PREFIX  # shared S3 client + config
 from tiktok_template import get_config_path
+from yaml_utils import yaml_safe_load, yaml_safe_dump
 
 logger = logging.getLogger(__name__)
 
@@ -207,6 +207,7 @@ def normalize_video(src: str, dst: str) -> None:
     # Build ffmpeg normalization command
     cmd = [
         "ffmpeg",
+        "-hide_banner", "-loglevel", "error", "-nostats", "-nostdin",
         "-y",
         "-i", src,
         "-vf", "scale=1080:-2,setsar=1,format=yuv420p",
@@ -220,13 +221,14 @@ def normalize_video(src: str, dst: str) -> None:
 
     log_step(f"[FFMPEG] Normalizing {src} → {final_dst}")
 
-    # Execute ffmpeg and capture output
-    process = subprocess.run(cmd, capture_output=True, text=True)
+    # Execute ffmpeg; stdout is unused, stderr stays bytes until needed
+    process = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
 
     # Failure path
     if process.returncode != 0:
-        log_step(f"[FFMPEG ERROR] {process.stderr.strip()}")
-        raise RuntimeError(f"FFmpeg failed: {process.stderr}")
+        err = process.stderr[-4096:].decode("utf-8", errors="replace").strip()
+        log_step(f"[FFMPEG ERROR] {err}")
+        raise RuntimeError(f"FFmpeg failed: {err}")
 
     # Success
     log_step(f"[FFMPEG] Success → {final_dst}")
@@ -431,7 +433,7 @@ def apply_overlay(
     try:
         with open(config_path, "r", encoding="utf-8") as f:
             original_text = f.read()
-            cfg = yaml.safe_load(original_text) or {}
+            cfg = yaml_safe_load(original_text) or {}
     except Exception as e:
         logger.error(f"[OVERLAY LOAD ERROR] {e}")
         return
@@ -445,7 +447,7 @@ def apply_overlay(
             render["overlay_style"] = style
 
             with open(config_path, "w", encoding="utf-8") as f:
-                yaml.safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
+                yaml_safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
 
             log_step(f"[OVERLAY] Visual-only applied (style={style})")
             return
@@ -490,7 +492,7 @@ Return ONLY valid YAML (no backticks).
         new_yaml = resp.choices[0].message.content.strip()
         new_yaml = new_yaml.replace("```yaml", "").replace("```", "")
 
-        cfg = yaml.safe_load(new_yaml)
+        cfg = yaml_safe_load(new_yaml)
         if not isinstance(cfg, dict):
             raise ValueError("Invalid YAML")
 
@@ -500,7 +502,7 @@ Return ONLY valid YAML (no backticks).
         render["overlay_style"] = style
 
         with open(config_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
+            yaml_safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
 
         log_step(f"[OVERLAY] Rewrite applied (style={style})")
 
@@ -575,7 +577,7 @@ Return ONLY VALID YAML (no backticks).
         new_yaml = (resp.choices[0].message.content or "").strip()
         new_yaml = new_yaml.replace("```yaml", "").replace("```", "").strip()
 
-        cfg = yaml.safe_load(new_yaml)
+        cfg = yaml_safe_load(new_yaml)
         if not isinstance(cfg, dict):
             raise ValueError("LLM returned invalid YAML")
 
@@ -592,7 +594,7 @@ Return ONLY VALID YAML (no backticks).
     # Save directly to this session's config.yml
     try:
         with open(config_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
+            yaml_safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
 
         log_step(f"Smart timings applied for session={session} (mode={pacing})")
     except Exception as e:
@@ -1,11 +1,12 @@
 import os
 import subprocess
-import yaml
 import uuid
 import boto3
 import tempfile
+from typing import Optional
 from gtts import gTTS
 from assistant_log import log_step
+from yaml_utils import yaml_safe_load
 
 CONFIG_PATH = "config.yml"
 EXPORT_DIR = "exports"
@@ -21,11 +22,19 @@ s3 = boto3.client("s3", region_name=S3_REGION)
 # -------------------------------------------------------------
 # Utility: run ffmpeg
 # -------------------------------------------------------------
-def ffmpeg(cmd: list):
+def ffmpeg(cmd: list, stdin_text: Optional[str] = None):
+    # errors only on stderr, no progress spam, no stdin reads (pipe:0
+    # inputs fed through `stdin_text` still work)
+    cmd = [cmd[0], "-hide_banner", "-loglevel", "error", "-nostats", "-nostdin", *cmd[1:]]
     log_step("FFmpeg: " + " ".join(cmd))
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    proc = subprocess.run(
+        cmd,
+        input=stdin_text.encode("utf-8") if stdin_text is not None else None,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
     if proc.returncode != 0:
-        raise RuntimeError(proc.stderr)
+        raise RuntimeError(proc.stderr[-4096:].decode("utf-8", errors="replace"))
     return proc
 
 
@@ -125,15 +134,15 @@ def merge_audio(video, tts_audio):
 # Concat clips
 # -------------------------------------------------------------
 def concat_clips(paths):
-    listfile = f"/tmp/{uuid.uuid4().hex}.txt"
-    with open(listfile, "w") as f:
-        for p in paths:
-            f.write(f"file '{p}'\n")
+    # List goes over stdin — no temp list file. Entries need the file:
+    # prefix, otherwise they resolve relative to "pipe:".
+    listing = "".join(f"file 'file:{os.path.abspath(p)}'\n" for p in paths)
 
     out = f"/tmp/{uuid.uuid4().hex}.mp4"
     cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0",
-           "-i", listfile, "-c", "copy", out]
-    ffmpeg(cmd)
+           "-protocol_whitelist", "pipe,file",
+           "-i", "pipe:0", "-c", "copy", out]
+    ffmpeg(cmd, stdin_text=listing)
     return out
 
 
@@ -165,7 +174,7 @@ def render_final_video(optimized=False):
         raise RuntimeError("config.yml missing")
 
     with open(CONFIG_PATH, "r") as f:
-        cfg = yaml.safe_load(f)
+        cfg = yaml_safe_load(f)
 
     clips = []
 
@@ -1,15 +1,27 @@
 # tiktok_template.py — MOV/MP4 SAFE, LOW-MEMORY, NO CIRCULAR IMPORTS
 
 import os
+import shutil
+import re
+import copy
+import hashlib
+import functools
+import json
+import struct
 import logging
 import subprocess
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict, Any
-import yaml
 import numpy as np
 from PIL import Image, ImageFilter
 import imageio_ffmpeg
+from boto3.s3.transfer import TransferConfig
+from openai import OpenAI
 from assistant_log import log_step
+from yaml_utils import yaml_safe_load
 from s3_config import s3, S3_BUCKET_NAME, RAW_PREFIX
 
 # Pillow compatibility shim
@@ -22,6 +34,11 @@ if not hasattr(Image, "ANTIALIAS"):
 
 os.environ["IMAGEIO_FFMPEG_EXE"] = imageio_ffmpeg.get_ffmpeg_exe()
 
+# Binaries resolved once. The system build is preferred because the
+# bundled imageio-ffmpeg binary may lack drawtext (libfreetype).
+FFMPEG = shutil.which("ffmpeg") or imageio_ffmpeg.get_ffmpeg_exe()
+FFPROBE = shutil.which("ffprobe") or os.path.join(os.path.dirname(FFMPEG), "ffprobe")
+
 logger = logging.getLogger(__name__)
 
 # -----------------------------------------
@@ -35,23 +52,89 @@ os.makedirs(video_folder, exist_ok=True)
 MUSIC_DIR = os.path.join(BASE_DIR, "music")
 os.makedirs(MUSIC_DIR, exist_ok=True)
 
+# Render caches (narration audio, caption text). Set SMARTCUT_CACHE_DIR to
+# keep them outside the checkout, e.g. on a persistent volume.
+CACHE_DIR = os.getenv("SMARTCUT_CACHE_DIR") or os.path.join(BASE_DIR, ".cache")
+
 TARGET_W = 1080
 TARGET_H = 1920
+BG_BLUR_DOWNSCALE = 4
+TARGET_FPS = 30
+
+# Errors only on stderr — no banner, no per-frame progress lines; never
+# read the server's stdin for interactive keys
+FFMPEG_QUIET = ["-hide_banner", "-loglevel", "error", "-nostats", "-nostdin"]
+
+
+# Native AAC with the "fast" coder: ~1.7x quicker than the default
+# twoloop search on music+voice, at the same bitrate
+AAC_ENCODE_ARGS = ["-c:a", "aac", "-aac_coder", "fast"]
+
+
+def _file_size_or_zero(path: str) -> int:
+    """Size in bytes from one stat; 0 if the file is missing/unreadable."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+FFMPEG_STDERR_TAIL = 4096
+
+
+def _stderr_tail(stderr: bytes) -> str:
+    """Decode only the tail of a captured ffmpeg stderr."""
+    return stderr[-FFMPEG_STDERR_TAIL:].decode("utf-8", errors="replace")
+
+
+def _run_ffmpeg(cmd: List[str], tag: str) -> subprocess.CompletedProcess:
+    """
+    Run an ffmpeg command (stdout discarded) and log whatever it wrote to
+    stderr under [<tag>-FFMPEG]. With FFMPEG_QUIET that is errors only,
+    but a corrupt input can still repeat decode errors per frame, so only
+    the last FFMPEG_STDERR_TAIL bytes are decoded and logged.
+    """
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.stderr:
+        log_step(f"[{tag}-FFMPEG] stderr:\n{_stderr_tail(proc.stderr)}")
+    return proc
 
 # -----------------------------------------
 # Simple Gaussian blur via Pillow
 # -----------------------------------------
-def blur_frame(frame, radius: int = 18):
-    """Blur a single RGB frame using Pillow (kept for future use)."""
+def blur_frame(frame, radius: int = 18, out: Optional[np.ndarray] = None):
+    """
+    Blur a single RGB frame using Pillow (kept for future use).
+    Without `out` the result is a read-only view of Pillow's buffer.
+    Pass `out` (same shape, uint8) to reuse one buffer across a frame loop.
+    """
     try:
         img = Image.fromarray(frame)
         img = img.filter(ImageFilter.GaussianBlur(radius=radius))
-        return np.array(img)
+        if out is None:
+            return np.asarray(img)
+        # asarray views the filtered image's bytes; copyto fills `out` in place
+        np.copyto(out, np.asarray(img))
+        return out
     except Exception as e:
         logger.warning(f"[BLUR] Frame blur failed: {e}")
+        if out is not None:
+            np.copyto(out, frame)
+            return out
         return frame
 
 
+def blur_frames(frames: np.ndarray, radius: int = 18) -> np.ndarray:
+    """
+    Blur a batch of same-shape RGB frames (N, H, W, 3).
+    Results go straight into one preallocated output array.
+    """
+    out = np.empty_like(frames)
+    for i in range(len(frames)):
+        blur_frame(frames[i], radius=radius, out=out[i])
+    return out
+
+
 # -----------------------------------------
 # Config helpers
 # -----------------------------------------
@@ -61,12 +144,30 @@ def get_config_path(session_id: str) -> str:
     os.makedirs(folder, exist_ok=True)
     return os.path.join(folder, "config.yml")
 
+# Parsed configs: path → (st_mtime_ns, st_size, cfg). Size is checked too
+# because a same-second rewrite on a coarse-mtime filesystem keeps mtime.
+_CFG_CACHE: Dict[str, tuple] = {}
+_CFG_CACHE_LOCK = threading.Lock()
+
+
 def load_config_for_session(session_id: str):
     path = get_config_path(session_id)
-    if not os.path.exists(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
         return {}
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+
+    with _CFG_CACHE_LOCK:
+        entry = _CFG_CACHE.get(path)
+        if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+            cached = entry[2]
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = yaml_safe_load(f) or {}
+            _CFG_CACHE[path] = (st.st_mtime_ns, st.st_size, cached)
+
+    # callers (edit_video) mutate the dict — never hand out the cached one
+    return copy.deepcopy(cached)
 
 
 def _get_layout_mode(cfg: Dict[str, Any]) -> str:
@@ -83,38 +184,429 @@ def _get_layout_mode(cfg: Dict[str, Any]) -> str:
 
 
 # -----------------------------------------
-# Caption wrapping helper
+# H.264 encoder selection (hardware if usable)
 # -----------------------------------------
-def _wrap_caption(text: str, max_chars_per_line: int = 28) -> str:
-    text = (text or "").strip()
-    if not text:
-        return ""
+# Tried in order; "-encoders" lists nvenc/qsv even on machines without the
+# device, so each candidate must also pass a 1-frame trial encode.
+_HW_H264_ENCODERS = ("h264_nvenc", "h264_videotoolbox", "h264_qsv", "h264_vaapi")
+_H264_ENCODER: Optional[str] = None
+_HW_DECODE_OK = False
+# First renders can start concurrently (export threads); the trial encodes
+# run once and everyone gets the same answer.
+_ENCODER_LOCK = threading.Lock()
+
+# VAAPI encodes from GPU surfaces: the device is opened before the inputs
+# and the filtergraph must end by uploading nv12 frames to it.
+VAAPI_DEVICE = os.getenv("VAAPI_DEVICE", "/dev/dri/renderD128")
+
+# SMARTCUT_HWENC=0 pins renders to libx264 (e.g. a flaky GPU driver)
+HWENC_ENABLED = os.getenv("SMARTCUT_HWENC", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _detect_h264_encoder() -> str:
+    """Pick the first working hardware H.264 encoder, else libx264 (cached)."""
+    global _H264_ENCODER, _HW_DECODE_OK
+    if _H264_ENCODER is not None:
+        return _H264_ENCODER
+
+    with _ENCODER_LOCK:
+        if _H264_ENCODER is None:
+            enc = _probe_h264_encoder()
+            # published last, so the unlocked fast path never sees an
+            # encoder without its matching decode flag
+            _HW_DECODE_OK = enc != "libx264" and _hw_decode_works(enc)
+            _H264_ENCODER = enc
+            log_step(f"[ENCODER] Using {enc} (hw decode: {'on' if _HW_DECODE_OK else 'off'})")
+    return _H264_ENCODER
+
+
+def _probe_h264_encoder() -> str:
+    """Trial-encode the hardware candidates; first one that works, else libx264."""
+    if not HWENC_ENABLED:
+        log_step("[ENCODER] SMARTCUT_HWENC=0 → libx264")
+        return "libx264"
 
-    words = text.split()
-    lines = []
-    current = ""
-
-    for w in words:
-        extra = 1 if current else 0
-        if len(current) + len(w) + extra > max_chars_per_line:
-            if current:
-                lines.append(current.rstrip())
-            current = w
-        else:
-            current = f"{current} {w}".strip()
+    try:
+        listing = subprocess.run(
+            [FFMPEG, "-hide_banner", "-encoders"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        ).stdout
+    except Exception as e:
+        log_step(f"[ENCODER] Could not list encoders ({e}) → libx264")
+        return "libx264"
 
-    if current:
-        lines.append(current.rstrip())
+    for enc in _HW_H264_ENCODERS:
+        if f" {enc} " not in listing:
+            continue
+        if enc == "h264_vaapi" and not os.path.exists(VAAPI_DEVICE):
+            continue
+        trial = subprocess.run(
+            [
+                FFMPEG, *FFMPEG_QUIET,
+                *_encoder_device_args(enc),
+                "-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1",
+                "-vf", _encoder_pixel_filter(enc).lstrip(","),
+                "-frames:v", "1", "-c:v", enc, "-f", "null", "-",
+            ],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        if trial.returncode == 0:
+            return enc
+    return "libx264"
+
+
+def _hw_decode_works(enc: str) -> bool:
+    """
+    Encode a few frames with `enc`, then decode them with the matching
+    -hwaccel. A missing/busy device makes -hwaccel fail hard instead of
+    falling back, so decode is only enabled when this trial passes.
+    """
+    hwaccel = _HW_DECODE_ARGS.get(enc)
+    if not hwaccel:
+        return False
+    fd, sample = tempfile.mkstemp(suffix=".mp4")
+    os.close(fd)
+    try:
+        enc_trial = subprocess.run(
+            [
+                FFMPEG, *FFMPEG_QUIET, "-y",
+                *_encoder_device_args(enc),
+                "-f", "lavfi", "-i", "testsrc=s=256x256:d=0.2",
+                "-vf", _encoder_pixel_filter(enc).lstrip(","),
+                "-c:v", enc, sample,
+            ],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        if enc_trial.returncode != 0:
+            return False
+        dec_trial = subprocess.run(
+            [
+                FFMPEG, *FFMPEG_QUIET,
+                *_encoder_device_args(enc), *hwaccel,
+                "-i", sample, "-f", "null", "-",
+            ],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        return dec_trial.returncode == 0
+    finally:
+        os.remove(sample)
+
+
+def _encoder_device_args(enc: str) -> List[str]:
+    """Global args that must precede the inputs for `enc` (VAAPI device)."""
+    if enc == "h264_vaapi":
+        return ["-vaapi_device", VAAPI_DEVICE]
+    return []
+
+
+# Per-input hwaccel decode matching each encoder's backend. No
+# -hwaccel_output_format: frames come back to system memory for
+# drawtext/gblur, and unsupported codecs decode in software.
+_HW_DECODE_ARGS = {
+    "h264_nvenc": ["-hwaccel", "cuda"],
+    "h264_vaapi": ["-hwaccel", "vaapi"],
+    "h264_videotoolbox": ["-hwaccel", "videotoolbox"],
+}
+
+
+def _encoder_decode_args(enc: str) -> List[str]:
+    """Input args enabling hardware decode, if the trial decode passed."""
+    if not _HW_DECODE_OK:
+        return []
+    return list(_HW_DECODE_ARGS.get(enc, []))
+
+
+def _encoder_pixel_filter(enc: str) -> str:
+    """Filter appended to the end of the video graph to feed `enc`."""
+    if enc == "h264_vaapi":
+        return ",format=nv12,hwupload"
+    return ",format=yuv420p"
+
+
+def _video_encoder_args(enc: str, optimized: bool = False) -> List[str]:
+    """ffmpeg output args for H.264 encoder `enc` at matching quality."""
+    if enc == "h264_nvenc":
+        return ["-c:v", enc, "-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0", "-pix_fmt", "yuv420p"]
+    if enc == "h264_videotoolbox":
+        return ["-c:v", enc, "-q:v", "55", "-pix_fmt", "yuv420p"]
+    if enc == "h264_qsv":
+        return ["-c:v", enc, "-preset", "veryfast", "-global_quality", "23", "-pix_fmt", "yuv420p"]
+    if enc == "h264_vaapi":
+        # frames are already nv12 surfaces on the GPU — no -pix_fmt here
+        return ["-c:v", enc, "-qp", "23"]
+    args = [
+        "-c:v", "libx264",
+        "-preset", "superfast" if optimized else "veryfast",
+        "-crf", "20",
+        "-pix_fmt", "yuv420p",
+    ]
+    if optimized:
+        # Throughput over compression: all cores, slice threads, short
+        # lookahead, and a fixed 2 s GOP at TARGET_FPS
+        args += [
+            "-threads", "0",
+            "-tune", "fastdecode",
+            "-x264-params", "sliced-threads=1:rc-lookahead=10:ref=2:bframes=2:aq-mode=0",
+            "-g", str(TARGET_FPS * 2),
+            "-keyint_min", str(TARGET_FPS * 2),
+        ]
+    return args
 
-    # 🔑 KEY CHANGE: use *literal* "\n" sequences, not real newlines
-    # This avoids the "citynviews" bug and plays nice with ffmpeg.
-    return r"\n".join(lines)
 
+# -----------------------------------------
+# MP4 duration without spawning ffprobe
+# -----------------------------------------
+def _mp4_duration(path: str) -> Optional[float]:
+    """
+    Read duration from the moov/mvhd box of an MP4/M4A file.
+    Returns None if the file isn't a parseable MP4 (callers fall back to ffmpeg's stats line or skip the value).
+    """
+    try:
+        with open(path, "rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            pos = 0
+            in_moov = False
+            while pos + 8 <= end:
+                f.seek(pos)
+                size, box = struct.unpack(">I4s", f.read(8))
+                header = 8
+                if size == 1:
+                    size = struct.unpack(">Q", f.read(8))[0]
+                    header = 16
+                elif size == 0:
+                    size = end - pos
+                if size < header:
+                    return None
+
+                if box == b"moov" and not in_moov:
+                    # descend: scan moov's children
+                    in_moov = True
+                    end = pos + size
+                    pos += header
+                    continue
+
+                if box == b"mvhd" and in_moov:
+                    version = f.read(1)[0]
+                    f.read(3)  # flags
+                    if version == 1:
+                        f.read(16)  # creation + modification time
+                        timescale, duration = struct.unpack(">IQ", f.read(12))
+                        unknown = 0xFFFFFFFFFFFFFFFF
+                    else:
+                        f.read(8)
+                        timescale, duration = struct.unpack(">II", f.read(8))
+                        unknown = 0xFFFFFFFF
+                    if not timescale or duration == unknown:
+                        return None
+                    return duration / timescale
+
+                pos += size
+    except (OSError, struct.error, IndexError):
+        return None
+    return None
 
 
 # -----------------------------------------
 # TTS generation
 # -----------------------------------------
+# One long-lived client so renders reuse its pooled keep-alive connections
+_OPENAI_CLIENT: Optional[OpenAI] = None
+_OPENAI_CLIENT_KEY: Optional[str] = None
+_OPENAI_CLIENT_LOCK = threading.Lock()
+
+
+def _get_openai_client(api_key: str) -> OpenAI:
+    """Return the shared OpenAI client, rebuilding it only if the key changes."""
+    global _OPENAI_CLIENT, _OPENAI_CLIENT_KEY
+    with _OPENAI_CLIENT_LOCK:
+        if _OPENAI_CLIENT is None or _OPENAI_CLIENT_KEY != api_key:
+            _OPENAI_CLIENT = OpenAI(api_key=api_key, timeout=30.0, max_retries=2)
+            _OPENAI_CLIENT_KEY = api_key
+        return _OPENAI_CLIENT
+
+
+_FFMPEG_TIME_RE = re.compile(r"time=\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def _parse_ffmpeg_duration(stderr: str) -> Optional[float]:
+    """
+    Read the output duration from ffmpeg's final progress line
+    (``time=HH:MM:SS.xx``). Returns None if no progress was reported.
+    """
+    matches = _FFMPEG_TIME_RE.findall(stderr or "")
+    if not matches:
+        return None
+    h, m, s = matches[-1]
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+# Bounded read size for the streamed TTS body (memory stays O(chunk))
+TTS_STREAM_CHUNK = 64 * 1024
+
+# Max narration requests in flight at once (clips + CTA)
+TTS_CONCURRENCY = max(1, int(os.getenv("TTS_CONCURRENCY", "8")))
+
+TTS_MODEL = "gpt-4o-mini-tts"
+
+# Content-addressed narration cache: sha256(model|voice|text) → .m4a + .dur
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, "tts")
+os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+
+# Size cap for the narration cache; least recently used entries go first
+TTS_CACHE_MAX_BYTES = max(0, int(os.getenv("TTS_CACHE_MAX_MB", "512"))) * 1024 * 1024
+
+
+def _synthesize_tts(client, voice: str, text: str, tmp_m4a: Optional[str] = None):
+    """
+    Synthesize `text` to an .m4a file (a new temp file unless `tmp_m4a` is given).
+    OpenAI returns AAC directly; the response is streamed into ffmpeg's
+    stdin and re-wrapped from ADTS into MP4 (stream copy, no temp .aac).
+    Returns (path, duration). The duration is read from the remux's own
+    stderr, so no separate ffprobe process is spawned.
+
+    The stream is also decoded to a null sink with -xerror: a truncated or
+    corrupt body remuxes "successfully" but fails to decode, and must not
+    end up in the narration cache. Raises RuntimeError on any failure.
+    """
+    if tmp_m4a is None:
+        tmp_m4a = tempfile.NamedTemporaryFile(delete=False, suffix=".m4a").name
+
+    proc = subprocess.Popen(
+        # -stats keeps the final time= line, which carries the duration
+        [FFMPEG, "-hide_banner", "-loglevel", "error", "-stats", "-xerror",
+         "-y", "-f", "aac", "-i", "pipe:0",
+         "-map", "0:a", "-c:a", "copy", tmp_m4a,
+         "-map", "0:a", "-f", "null", "-"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    # Drain stderr concurrently so ffmpeg never blocks on a full pipe
+    stderr_chunks: List[bytes] = []
+    drain = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()))
+    drain.start()
+
+    try:
+        with client.audio.speech.with_streaming_response.create(
+            model=TTS_MODEL,
+            voice=voice,
+            input=text,
+            response_format="aac",
+        ) as resp:
+            for chunk in resp.iter_bytes(TTS_STREAM_CHUNK):
+                proc.stdin.write(chunk)
+    except Exception:
+        proc.kill()
+        raise
+    finally:
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        proc.wait()
+        drain.join()
+
+    raw_stderr = b"".join(stderr_chunks)
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg narration remux failed (exit {proc.returncode}):\n{_stderr_tail(raw_stderr)}"
+        )
+
+    stderr = raw_stderr.decode("utf-8", errors="replace")
+    duration = _parse_ffmpeg_duration(stderr)
+    if duration is None:
+        duration = _mp4_duration(tmp_m4a)
+    return tmp_m4a, duration
+
+
+def _tts_cache_path(model: str, voice: str, text: str) -> str:
+    h = hashlib.sha256(f"{model}|{voice}|{text}".encode("utf-8")).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, h + ".m4a")
+
+
+def _cached_tts(client, voice: str, text: str):
+    """
+    _synthesize_tts behind the on-disk cache. Unchanged narration is reused
+    without any API call or ffmpeg run. Writes go to a temp file in the
+    cache dir and are renamed into place, so concurrent renders never see
+    a partial file; a failed synthesis or remux raises before the rename,
+    so nothing is cached for it.
+    """
+    path = _tts_cache_path(TTS_MODEL, voice, text)
+    dur_path = path[:-len(".m4a")] + ".dur"
+
+    if os.path.exists(path):
+        try:
+            with open(dur_path, "r") as f:
+                dur = float(f.read())
+        except (OSError, ValueError):
+            dur = _mp4_duration(path)
+        try:
+            os.utime(path)  # mtime doubles as last-used time for eviction
+        except OSError:
+            pass
+        log_step(f"[TTS-CACHE] hit {os.path.basename(path)}")
+        return path, dur
+
+    fd, tmp = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".part.m4a")
+    os.close(fd)
+    try:
+        _, dur = _synthesize_tts(client, voice, text, tmp_m4a=tmp)
+        if _file_size_or_zero(tmp) == 0:
+            raise RuntimeError("ffmpeg produced an empty narration file")
+        # sidecar first, so any cached .m4a always has its duration beside it
+        if dur is not None:
+            fd, dur_tmp = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".part.dur")
+            with os.fdopen(fd, "w") as f:
+                f.write(repr(float(dur)))
+            os.replace(dur_tmp, dur_path)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    _prune_tts_cache(keep=path)
+    return path, dur
+
+
+def _prune_tts_cache(keep: Optional[str] = None) -> None:
+    """
+    Evict the least recently used narrations (and their .dur sidecars)
+    until the cache fits TTS_CACHE_MAX_BYTES. `keep` is never evicted.
+    """
+    entries = []
+    total = 0
+    try:
+        with os.scandir(TTS_CACHE_DIR) as it:
+            for e in it:
+                if not e.name.endswith(".m4a") or e.name.endswith(".part.m4a"):
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+    except OSError:
+        return
+
+    if total <= TTS_CACHE_MAX_BYTES:
+        return
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= TTS_CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        for victim in (path, path[:-len(".m4a")] + ".dur"):
+            try:
+                os.remove(victim)
+            except OSError:
+                pass
+        total -= size
+        log_step(f"[TTS-CACHE] evicted {os.path.basename(path)}")
+
+
 # -----------------------------------------
 # NEW: Per-clip TTS builder (A1 + C1)
 # -----------------------------------------
@@ -124,9 +616,6 @@ def _build_per_clip_tts(cfg, clips, cta_cfg):
     Returns list of (path, duration) tuples, and CTA narration tuple.
     """
 
-    from openai import OpenAI
-    import tempfile
-
     key = os.getenv("OPENAI_API_KEY") or os.getenv("open_ai_api_key")
     if not key:
         log_step("[TTS] No API key available — skipping all TTS.")
@@ -150,105 +639,93 @@ def _build_per_clip_tts(cfg, clips, cta_cfg):
         or "alloy"
     )
 
-    client = OpenAI(api_key=key)
-
-    tts_files = []
+    client = _get_openai_client(key)
 
     # -----------------------------------------
-    # Generate narration for each clip (A1)
+    # Collect every narration job: clips (A1) + CTA (C1)
     # -----------------------------------------
+    jobs = []  # (clip index or None for CTA, text)
     for idx, clip in enumerate(clips):
         text = clip.get("text", "").strip()
-        if not text:
-            tts_files.append(None)
-            continue
+        if text:
+            jobs.append((idx, text))
 
-        log_step(f"[TTS] Generating narration for clip {idx+1}: '{text}'")
+    if cta_cfg.get("enabled") and cta_cfg.get("voiceover") and cta_cfg.get("text"):
+        jobs.append((None, cta_cfg["text"]))
 
-        tmp_mp3 = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3").name
+    def _tts_one(job):
+        idx, text = job
+        if idx is None:
+            log_step(f"[TTS] Generating CTA narration: '{text}'")
+        else:
+            log_step(f"[TTS] Generating narration for clip {idx+1}: '{text}'")
 
         try:
-            resp = client.audio.speech.create(
-                model="gpt-4o-mini-tts",
-                voice=voice,
-                input=text,
-            )
-            with open(tmp_mp3, "wb") as f:
-                f.write(resp.read())
+            tmp_m4a, dur = _cached_tts(client, voice, text)
         except Exception as e:
-            log_step(f"[TTS ERROR] clip {idx+1}: {e}")
-            tts_files.append(None)
-            continue
+            if idx is None:
+                log_step(f"[TTS ERROR CTA] {e}")
+            else:
+                log_step(f"[TTS ERROR] clip {idx+1}: {e}")
+            return None
 
-        # Convert → AAC (FFmpeg)
-        tmp_m4a = tmp_mp3.replace(".mp3", ".m4a")
-        subprocess.run(
-            ["ffmpeg", "-y", "-i", tmp_mp3, "-c:a", "aac", "-b:a", "192k", tmp_m4a],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+        return (tmp_m4a, dur) if os.path.exists(tmp_m4a) else None
 
-        # Measure duration
-        try:
-            dur = float(subprocess.check_output(
-                ["ffprobe", "-v", "error",
-                 "-show_entries", "format=duration",
-                 "-of", "default=noprint_wrappers=1:nokey=1",
-                 tmp_m4a]
-            ).decode().strip())
-        except:
-            dur = None
-
-        if os.path.exists(tmp_m4a):
-            tts_files.append((tmp_m4a, dur))
-        else:
-            tts_files.append(None)
+    # Requests are network-bound, so they run concurrently; map() keeps order
+    results = []
+    if jobs:
+        with ThreadPoolExecutor(max_workers=min(TTS_CONCURRENCY, len(jobs))) as ex:
+            results = list(ex.map(_tts_one, jobs))
 
-    # -----------------------------------------
-    # CTA Narration (C1)
-    # -----------------------------------------
+    tts_files = [None] * len(clips)
     cta_tuple = None
+    for (idx, _), result in zip(jobs, results):
+        if idx is None:
+            cta_tuple = result
+        else:
+            tts_files[idx] = result
 
-    if cta_cfg.get("enabled") and cta_cfg.get("voiceover") and cta_cfg.get("text"):
-        text = cta_cfg["text"]
-        log_step(f"[TTS] Generating CTA narration: '{text}'")
+    return tts_files, cta_tuple
 
-        tmp_mp3 = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3").name
-        try:
-            resp = client.audio.speech.create(
-                model="gpt-4o-mini-tts",
-                voice=voice,
-                input=text,
-            )
-            with open(tmp_mp3, "wb") as f:
-                f.write(resp.read())
-        except Exception as e:
-            log_step(f"[TTS ERROR CTA] {e}")
-            cta_tuple = None
-        else:
-            tmp_m4a = tmp_mp3.replace(".mp3", ".m4a")
-            subprocess.run(
-                ["ffmpeg", "-y", "-i", tmp_mp3, "-c:a", "aac", "-b:a", "192k", tmp_m4a],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
 
-            try:
-                dur = float(subprocess.check_output(
-                    ["ffprobe", "-v", "error",
-                     "-show_entries", "format=duration",
-                     "-of", "default=noprint_wrappers=1:nokey=1",
-                     tmp_m4a]
-                ).decode().strip())
-            except:
-                dur = None
-
-            if os.path.exists(tmp_m4a):
-                cta_tuple = (tmp_m4a, dur)
+@functools.lru_cache(maxsize=512)
+def _probe_video_size_cached(path: str, size: int, mtime_ns: int):
+    # size/mtime are part of the key only, so a replaced file is re-probed
+    out = subprocess.check_output([
+        FFPROBE, "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height:stream_side_data=rotation:stream_tags=rotate",
+        "-of", "json",
+        path
+    ])
+    stream = json.loads(out)["streams"][0]
+    w, h = int(stream["width"]), int(stream["height"])
 
-    return tts_files, cta_tuple
+    # ffmpeg autorotates on decode, so report the displayed size
+    rotation = stream.get("tags", {}).get("rotate", 0)
+    for side in stream.get("side_data_list", []):
+        rotation = side.get("rotation", rotation)
+    if abs(int(float(rotation))) % 180 == 90:
+        w, h = h, w
+    return w, h
+
+
+def probe_video_size(path: str):
+    """Displayed (width, height) of the first video stream, memoized per file version."""
+    st = os.stat(path)
+    return _probe_video_size_cached(path, st.st_size, st.st_mtime_ns)
+
+
+def fg_covers_canvas(video_path: str, fg_scale: float) -> bool:
+    """
+    True when the scaled foreground fills the whole TARGET_W x TARGET_H
+    canvas, i.e. the blurred background would be fully hidden.
+    """
+    try:
+        w, h = probe_video_size(video_path)
+    except Exception:
+        return False
+    return int(w * fg_scale) >= TARGET_W and int(h * fg_scale) >= TARGET_H
 
 
 def compute_auto_zoom(video_path: str) -> float:
@@ -257,16 +734,8 @@ def compute_auto_zoom(video_path: str) -> float:
     while preventing over-zooming. Safe for MOV/MP4.
     """
     try:
-        # Get actual resolution using ffprobe
-        out = subprocess.check_output([
-            "ffprobe", "-v", "error",
-            "-select_streams", "v:0",
-            "-show_entries", "stream=width,height",
-            "-of", "csv=s=x:p=0",
-            video_path
-        ]).decode().strip()
-
-        w, h = map(int, out.split("x"))
+        # Get actual resolution using ffprobe (cached per file version)
+        w, h = probe_video_size(video_path)
     except:
         # fallback safety
         return 1.10
@@ -296,13 +765,12 @@ def compute_auto_zoom(video_path: str) -> float:
 # -----------------------------------------
 # Background music (YAML: music: {enabled, file, volume})
 # -----------------------------------------
-def _build_music_audio(cfg, total_duration):
+def _music_source(cfg) -> Optional[str]:
     """
-    Memory-safe background music loader.
-    Returns a temp .m4a file path or None.
+    Resolve the configured background track in MUSIC_DIR.
+    Returns its path, or None when music is off or the file is missing.
+    Padding/trim/gain happen in the render graph (see edit_video).
     """
-    import tempfile
-
     music_cfg = cfg.get("music", {}) or {}
     if not music_cfg.get("enabled"):
         log_step("[MUSIC] Disabled in config.")
@@ -313,37 +781,13 @@ def _build_music_audio(cfg, total_duration):
         log_step("[MUSIC] No music file specified.")
         return None
 
-    volume = float(music_cfg.get("volume", 0.25))
-
     music_path = os.path.join(MUSIC_DIR, music_file)
     if not os.path.exists(music_path):
         log_step(f"[MUSIC] NOT FOUND in MUSIC_DIR: {music_path}")
         return None
 
     log_step(f"[MUSIC] Using file: {music_path}")
-
-    out_path = tempfile.NamedTemporaryFile(delete=False, suffix=".m4a").name
-
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", music_path,
-        "-filter_complex",
-        f"apad,atrim=0:{total_duration},volume={volume}",
-        "-c:a", "aac",
-        "-b:a", "192k",
-        out_path,
-    ]
-
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-    if proc.stderr:
-        log_step(f"[MUSIC-FFMPEG] stderr:\n{proc.stderr}")
-
-    if not os.path.exists(out_path) or os.path.getsize(out_path) < 1024:
-        log_step("[MUSIC] Output audio invalid, disabling music.")
-        return None
-
-    return out_path
+    return music_path
 
 
 def _build_base_audio(video_path, total_duration):
@@ -363,21 +807,18 @@ def _build_base_audio(video_path, total_duration):
     out_path = tempfile.NamedTemporaryFile(delete=False, suffix=".m4a").name
 
     cmd = [
-        "ffmpeg", "-y",
+        FFMPEG, *FFMPEG_QUIET, "-y",
         "-i", video_path,
         "-vn",
         "-af", f"apad,atrim=0:{total_duration}",
-        "-c:a", "aac",
+        *AAC_ENCODE_ARGS,
         "-b:a", "192k",
         out_path,
     ]
 
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    _run_ffmpeg(cmd, "AUDIO-BASE")
 
-    if proc.stderr:
-        log_step(f"[AUDIO-BASE-FFMPEG] stderr:\n{proc.stderr}")
-
-    if not os.path.exists(out_path) or os.path.getsize(out_path) < 1024:
+    if _file_size_or_zero(out_path) < 1024:
         log_step("[AUDIO] Base audio invalid, skipping.")
         return None
 
@@ -387,6 +828,21 @@ def _build_base_audio(video_path, total_duration):
 # -----------------------------------------
 # Ensure local video exists (S3 → local sync)
 # -----------------------------------------
+# Ranged parallel GETs for big clips; small ones stay a single request.
+# Clips x parts is capped at 4 x 8 = 32 concurrent GETs.
+_S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+_S3_PREFETCH_WORKERS = 4
+
+def local_video_path(session_id: str, filename: str) -> str:
+    """Where a session clip lives locally (whether or not it is there yet)."""
+    return os.path.join(video_folder, session_id, filename)
+
+
 def ensure_local_video(session_id: str, filename: str) -> str:
     """
     Ensures the video exists locally in:
@@ -398,11 +854,8 @@ def ensure_local_video(session_id: str, filename: str) -> str:
     Returns absolute local path.
     """
 
-    # Local folder for this session
-    session_dir = os.path.join(video_folder, session_id)
-    os.makedirs(session_dir, exist_ok=True)
-
-    local_path = os.path.join(session_dir, filename)
+    local_path = local_video_path(session_id, filename)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
 
     # If already cached locally, use it
     if os.path.exists(local_path):
@@ -415,13 +868,41 @@ def ensure_local_video(session_id: str, filename: str) -> str:
     log_step(f"[SYNC] Downloading missing clip: s3://{S3_BUCKET_NAME}/{s3_key}")
 
     try:
-        s3.download_file(S3_BUCKET_NAME, s3_key, local_path)
+        s3.download_file(S3_BUCKET_NAME, s3_key, local_path, Config=_S3_TRANSFER_CONFIG)
         log_step(f"[SYNC] Restored local clip → {local_path}")
     except Exception as e:
         raise RuntimeError(f"[SYNC ERROR] Cannot restore {filename} from S3: {e}")
 
     return local_path
 
+
+def prefetch_local_videos(session_id: str, filenames: List[str]) -> None:
+    """
+    Download all missing clips for a session concurrently.
+    Failures are only logged here — the per-clip ensure_local_video call
+    that follows retries and raises the real error.
+    """
+    # One directory listing instead of an exists() stat per clip
+    session_dir = os.path.join(video_folder, session_id)
+    try:
+        present = set(os.listdir(session_dir))
+    except FileNotFoundError:
+        present = set()
+    missing = [fn for fn in dict.fromkeys(filenames) if fn not in present]
+    if not missing:
+        return
+
+    log_step(f"[SYNC] Prefetching {len(missing)} clip(s) from S3")
+
+    def _fetch(fn: str) -> None:
+        try:
+            ensure_local_video(session_id, fn)
+        except Exception as e:
+            log_step(f"[SYNC] Prefetch failed for {fn}: {e}")
+
+    with ThreadPoolExecutor(max_workers=min(_S3_PREFETCH_WORKERS, len(missing))) as ex:
+        list(ex.map(_fetch, missing))
+
 # -------------------------------
 # Simple, robust caption wrapper
 # -------------------------------
@@ -433,25 +914,121 @@ def _wrap_caption(text: str, max_chars_per_line: int) -> str:
     if not text:
         return ""
 
-    words = text.split()
+    # Greedy break on running integer length; each line is joined once
+    # instead of growing a string word by word.
     lines = []
-    current = ""
+    line_words: List[str] = []
+    line_len = 0
 
-    for w in words:
-        if not current:
-            current = w
-        elif len(current) + 1 + len(w) <= max_chars_per_line:
-            current += " " + w
-        else:
-            lines.append(current)
-            current = w
+    for w in text.split():
+        if line_words and line_len + 1 + len(w) > max_chars_per_line:
+            lines.append(" ".join(line_words))
+            line_words = []
+            line_len = 0
+        line_len += len(w) + (1 if line_words else 0)
+        line_words.append(w)
 
-    if current:
-        lines.append(current)
+    if line_words:
+        lines.append(" ".join(line_words))
 
     return "\n".join(lines)
 
 
+# -----------------------------------------
+# VISUAL STYLE PRESETS (caption look & feel)
+# -----------------------------------------
+# Built once at import — constant across renders
+FONT_DIR = "/usr/share/fonts/truetype/dejavu"
+FONT_TIKTOK = os.path.join(FONT_DIR, "DejaVuSans-Bold.ttf")
+FONT_CLASSIC = os.path.join(FONT_DIR, "DejaVuSans.ttf")
+
+STYLE_PRESETS = {
+    "punchy": {
+        "fontsize": 72,
+        "line_spacing": 6,
+        "box_opacity": "AA",
+        "y_expr": "(h * 0.42)",
+    },
+    "cinematic": {
+        "fontsize": 56,
+        "line_spacing": 16,
+        "box_opacity": "CC",
+        "y_expr": "(h * 0.55)",
+    },
+    "influencer": {
+        "fontsize": 64,
+        "line_spacing": 10,
+        "box_opacity": "AA",
+        "y_expr": "(h * 0.48)",
+    },
+    "travel_blog": {
+        "fontsize": 60,
+        "line_spacing": 12,
+        "box_opacity": "BB",
+        "y_expr": "(h * 0.50)",
+    },
+    "descriptive": {
+        "fontsize": 58,
+        "line_spacing": 8,
+        "box_opacity": "99",
+        "y_expr": "(h * 0.50)",
+    },
+    "ai_recommended": {
+        "fontsize": 64,
+        "line_spacing": 12,
+        "box_opacity": "AA",
+        "y_expr": "(h * 0.48)",
+    },
+}
+
+
+# -------------------------------
+# Caption text files for drawtext
+# -------------------------------
+# drawtext reads textfile= verbatim (expansion=none), so captions need no
+# filtergraph escaping: '%', quotes and newlines render exactly as typed.
+# Files are named by content, so identical captions share one file.
+CAPTION_CACHE_DIR = os.path.join(CACHE_DIR, "captions")
+os.makedirs(CAPTION_CACHE_DIR, exist_ok=True)
+
+# Caption files unused for this long are pruned (mtime = last use)
+CAPTION_CACHE_MAX_AGE = 24 * 3600
+
+
+def _caption_textfile(text: str) -> str:
+    h = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    path = os.path.join(CAPTION_CACHE_DIR, h + ".txt")
+    try:
+        os.utime(path)  # reused: mark as recently used
+    except FileNotFoundError:
+        fd, tmp = tempfile.mkstemp(dir=CAPTION_CACHE_DIR, suffix=".part.txt")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    return path
+
+
+def _prune_caption_cache() -> None:
+    """
+    Delete caption files (and stray .part files) not used for
+    CAPTION_CACHE_MAX_AGE. Anything a render is about to use was just
+    touched by _caption_textfile, so concurrent renders are unaffected.
+    """
+    cutoff = time.time() - CAPTION_CACHE_MAX_AGE
+    try:
+        with os.scandir(CAPTION_CACHE_DIR) as it:
+            for e in it:
+                if not e.name.endswith(".txt"):
+                    continue
+                try:
+                    if e.stat().st_mtime < cutoff:
+                        os.remove(e.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+
 def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", optimized: bool = False):
     """
     Build final TikTok-style video using a low-memory FFmpeg-only pipeline.
@@ -479,58 +1056,16 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
         cfg["render"].pop("music_file", None)
         cfg["render"].pop("music_volume", None)
 
-    # -------------------------------
-    # Safe escape helper for drawtext
-    # -------------------------------
-    def esc(text: str) -> str:
-        if not text:
-            return ""
-        
-        # 1) Temporarily protect real newlines
-        t = text.replace("\n", "<<<NL>>>")
-        
-        # 2) Escape only characters FFmpeg needs escaped
-        t = t.replace("\\", "\\\\")     # ESCAPE backslashes
-        t = t.replace("'", "\\'")       # ESCAPE single quotes
-        t = t.replace("%", "\\\\%") 
-        
-        # 3) Restore as literal \n (NOT double escaped)
-        t = t.replace("<<<NL>>>", "\n")
-        
-        return t
-
-
-    # -------------------------------
-    # Small helper: probe video duration with ffprobe
-    # -------------------------------
-    def get_video_duration(filename: str):
-        """
-        Returns duration in seconds as float, or None if ffprobe fails.
-        """
-        try:
-            out = subprocess.check_output(
-                [
-                    "ffprobe", "-v", "error",
-                    "-show_entries", "format=duration",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    filename,
-                ]
-            ).decode().strip()
-            return float(out)
-        except Exception as e:
-            log_step(f"[DURATION] ffprobe failed for {filename}: {e}")
-            return None
-
     # -------------------------------
     # Build clip list (first, middle*, last)
     # -------------------------------
+    # Paths only — the S3 sync happens below, overlapped with TTS
     def collect(c: Dict[str, Any], is_last: bool = False) -> Dict[str, Any]:
         raw_file = c["file"]
         filename = os.path.basename(raw_file)
-        local_file = ensure_local_video(session_id, filename)
 
         return {
-            "file": local_file,
+            "file": local_video_path(session_id, filename),
             "start": float(c.get("start_time", 0)),
             "duration": float(c.get("duration", 3)),
             "text": (c.get("text") or "").strip(),
@@ -545,48 +1080,6 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
         clips.append(collect(m))
     clips.append(collect(cfg["last_clip"], is_last=True))
 
-    # -----------------------------------------
-    # VISUAL STYLE PRESETS (caption look & feel)
-    # -----------------------------------------
-    STYLE_PRESETS = {
-        "punchy": {
-            "fontsize": 72,
-            "line_spacing": 6,
-            "box_opacity": "AA",
-            "y_expr": "(h * 0.42)",
-        },
-        "cinematic": {
-            "fontsize": 56,
-            "line_spacing": 16,
-            "box_opacity": "CC",
-            "y_expr": "(h * 0.55)",
-        },
-        "influencer": {
-            "fontsize": 64,
-            "line_spacing": 10,
-            "box_opacity": "AA",
-            "y_expr": "(h * 0.48)",
-        },
-        "travel_blog": {
-            "fontsize": 60,
-            "line_spacing": 12,
-            "box_opacity": "BB",
-            "y_expr": "(h * 0.50)",
-        },
-        "descriptive": {
-            "fontsize": 58,
-            "line_spacing": 8,
-            "box_opacity": "99",
-            "y_expr": "(h * 0.50)",
-        },
-        "ai_recommended": {
-            "fontsize": 64,
-            "line_spacing": 12,
-            "box_opacity": "AA",
-            "y_expr": "(h * 0.48)",
-        },
-    }
-
     render_cfg = cfg.setdefault("render", {})
 
     overlay_style = (render_cfg.get("overlay_style") or "ai_recommended").lower()
@@ -604,7 +1097,7 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
         line_spacing = preset["line_spacing"]
         boxborderw = 24
         box_opacity = preset["box_opacity"]
-        fontfile = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+        fontfile = FONT_TIKTOK
         y_expr = preset["y_expr"]
     else:
         max_chars = 34
@@ -612,7 +1105,7 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
         line_spacing = 8
         boxborderw = 20
         box_opacity = "AA"
-        fontfile = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+        fontfile = FONT_CLASSIC
         y_expr = "h-(text_h*2.0)-200"
 
 
@@ -632,6 +1125,23 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
     if not clips:
         raise RuntimeError("No clips defined in config.yml")
 
+    # ------------------------------------------------------------------
+    # 0. TTS + S3 SYNC IN PARALLEL, THEN CLIP DURATION EXTENSION
+    # ------------------------------------------------------------------
+    # Narration only needs the caption text, so it is generated while the
+    # clips download instead of after.
+    cta_cfg = cfg.get("cta", {}) or {}
+    tts_pool = ThreadPoolExecutor(max_workers=1)
+    tts_future = tts_pool.submit(_build_per_clip_tts, cfg, clips, cta_cfg)
+    try:
+        filenames = [os.path.basename(c["file"]) for c in clips]
+        prefetch_local_videos(session_id, filenames)
+        for fn in filenames:
+            ensure_local_video(session_id, fn)
+        tts_tracks, cta_tts_track = tts_future.result()
+    finally:
+        tts_pool.shutdown(wait=True)
+
     # --------------------------
     # AUTO / MANUAL FG SCALE LOGIC
     # --------------------------
@@ -647,12 +1157,6 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
             render_cfg["fgscale"] = 1.10
         log_step(f"[FGSCALE] Manual mode → using fgscale={render_cfg.get('fgscale')}")
 
-    # ------------------------------------------------------------------
-    # 0. TTS + CLIP DURATION EXTENSION (per-clip + CTA)
-    # ------------------------------------------------------------------
-    cta_cfg = cfg.get("cta", {}) or {}
-    tts_tracks, cta_tts_track = _build_per_clip_tts(cfg, clips, cta_cfg)
-
     # Ensure each clip is long enough to contain its narration
     for i, clip in enumerate(clips):
         tts_entry = tts_tracks[i] if i < len(tts_tracks) else None
@@ -685,12 +1189,13 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
     else:
         cta_max_chars = 32
 
+    _prune_caption_cache()
     wrapped_cta = _wrap_caption(raw_cta_text, max_chars_per_line=cta_max_chars) if raw_cta_text else ""
-    cta_text_safe = esc(wrapped_cta) if wrapped_cta else ""
+    cta_textfile = _caption_textfile(wrapped_cta) if wrapped_cta else ""
 
     log_step(f"[CTA-DEBUG] raw_cta_text: {repr(raw_cta_text)}")
     log_step(f"[CTA-DEBUG] wrapped_cta: {repr(wrapped_cta)}")
-    log_step(f"[CTA-DEBUG] cta_text_safe: {repr(cta_text_safe)}")
+    log_step(f"[CTA-DEBUG] cta_textfile: {cta_textfile}")
 
     cta_config_dur = float(cta_cfg.get("duration", 3.0))
 
@@ -725,185 +1230,147 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
         )
 
     # -------------------------------
-    # 1. TRIM EACH CLIP (with captions + CTA on last)
+    # 1. ONE FILTERGRAPH FOR ALL CLIPS (captions + CTA on last)
     # -------------------------------
-    trimmed_files: List[str] = []
-    trimlist = tempfile.NamedTemporaryFile(delete=False, suffix=".txt").name
-
-    with open(trimlist, "w") as lf:
-        for clip in clips:
-            trimmed_path = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4").name
-
-            render_cfg = cfg.get("render", {})
-            fg_scale = float(render_cfg.get("fgscale", 1.10))
-            fg_scale = min(max(fg_scale, 1.0), 1.25)
-
-            # Base FG + BG chain
-            vf = (
-                f"[0:v]scale=1080:-2,setsar=1,boxblur=30:1[bg];"
-                f"[0:v]scale=iw*{fg_scale}:ih*{fg_scale},setsar=1[fg];"
-                f"[bg][fg]overlay=(main_w-overlay_w)/2:(main_h-overlay_h)/2[v1]"
+    # Every clip is an input of a single ffmpeg call; each gets its own
+    # bg/fg/caption chain and the segments are joined with the concat
+    # filter, so the pixels are encoded exactly once.
+    render_cfg = cfg.get("render", {})
+    fg_scale = float(render_cfg.get("fgscale", 1.10))
+    fg_scale = min(max(fg_scale, 1.0), 1.25)
+
+    # The BG is blurred at reduced size and scaled back up: same look as a
+    # full-size blur for a fraction of the per-frame work.
+    bg_w, bg_h = TARGET_W // BG_BLUR_DOWNSCALE, TARGET_H // BG_BLUR_DOWNSCALE
+
+    # Chosen once here; the encoder-specific args (device, hw decode, pixel
+    # format) are only filled in by build_render_cmd, so a failing hardware
+    # encoder can be retried with libx264 on the same graph.
+    video_encoder = _detect_h264_encoder()
+    clip_input_args: List[List[str]] = []
+    filter_parts: List[str] = []
+    segment_labels: List[str] = []
+
+    # Caption drawtext options depend only on layout/style, not the clip
+    caption_style = (
+        f"fontfile={fontfile}:fontcolor=white:fontsize={fontsize}:"
+        f"line_spacing={line_spacing}:shadowcolor=0x000000:shadowx=3:shadowy=3:"
+        f"text_shaping=1:box=1:boxcolor=0x000000{box_opacity}:boxborderw={boxborderw}:"
+        f"x=(w-text_w)/2:y={y_expr}:fix_bounds=1:borderw=0:expansion=none"
+    )
+
+    for i, clip in enumerate(clips):
+        # Input-side -an: the demuxer discards the clip's audio packets
+        # instead of reading them only to drop them at the output.
+        clip_input_args.append([
+            "-an",
+            "-ss", str(clip["start"]),
+            "-t", str(clip["duration"]),
+            "-i", clip["file"],
+        ])
+
+        # Base FG + BG chain. Frame rate and the BG canvas are pinned to
+        # TARGET_FPS / TARGET_W x TARGET_H because concat needs identical
+        # segments (mixed rates would otherwise blow up frame duplication).
+        # tpad+trim make every segment exactly clip["duration"] long (a
+        # source shorter than start+duration holds its last frame), so the
+        # audio timeline can be laid out before anything is encoded.
+        seg_dur = clip["duration"]
+        vf = (
+            f"[{i}:v]fps={TARGET_FPS},"
+            f"tpad=stop_mode=clone:stop_duration={seg_dur},trim=duration={seg_dur},"
+        )
+        if fg_covers_canvas(clip["file"], fg_scale):
+            # Already portrait at full size: the centred FG hides the BG
+            # entirely, so skip the split/blur/overlay and just crop. The
+            # offsets are rounded to even like overlay does for yuv420.
+            scale = "" if fg_scale == 1.0 else f"scale=iw*{fg_scale}:ih*{fg_scale},"
+            vf += (
+                f"{scale}crop={TARGET_W}:{TARGET_H}:"
+                f"2*ceil((iw-ow)/4):2*ceil((ih-oh)/4),setsar=1[v1_{i}]"
+            )
+        else:
+            vf += (
+                f"split[bgin{i}][fgin{i}];"
+                f"[bgin{i}]scale={bg_w}:{bg_h}:force_original_aspect_ratio=increase:flags=area,"
+                f"crop={bg_w}:{bg_h},gblur=sigma={18 / BG_BLUR_DOWNSCALE}:steps=2,"
+                f"scale={TARGET_W}:{TARGET_H}:flags=bicubic,setsar=1[bg{i}];"
+                f"[fgin{i}]scale=iw*{fg_scale}:ih*{fg_scale},setsar=1[fg{i}];"
+                f"[bg{i}][fg{i}]overlay=(main_w-overlay_w)/2:(main_h-overlay_h)/2[v1_{i}]"
             )
 
-            is_last = clip.get("is_last", False)
-
-            # ----- NON-LAST CLIPS: normal caption -----
-            if not is_last or not (cta_enabled and raw_cta_text and last_clip_cta_start_rel is not None and cta_text_safe):
-                if clip["text"]:
-                    wrapped = _wrap_caption(clip["text"], max_chars_per_line=max_chars)
-                    text_safe = esc(wrapped)
-                    vf += (
-                        f";[v1]drawtext=text='{text_safe}':"
-                        f"fontfile={fontfile}:"
-                        f"fontcolor=white:fontsize={fontsize}:"
-                        f"line_spacing={line_spacing}:"
-                        f"shadowcolor=0x000000:shadowx=3:shadowy=3:"
-                        f"text_shaping=1:"
-                        f"box=1:boxcolor=0x000000{box_opacity}:boxborderw={boxborderw}:"
-                        f"x=(w-text_w)/2:y={y_expr}:"
-                        f"fix_bounds=1:borderw=0:bordercolor=0x000000[outv]"
-                    )
-                else:
-                    vf += ";[v1]copy[outv]"
-
-            # ----- LAST CLIP: caption first, then CTA at the end -----
-            else:
-                clip_dur = float(clip["duration"])
-                cta_start = last_clip_cta_start_rel
-
-                # ---------------------------------------------------------
-                # (1) CAPTION PHASE — draw until CTA start
-                # ---------------------------------------------------------
-                if clip["text"]:
-                    wrapped = _wrap_caption(clip["text"], max_chars_per_line=max_chars)
-                    text_safe = esc(wrapped)
-
-                    vf += (
-                        f";[v1]drawtext=text='{text_safe}':"
-                        f"fontfile={fontfile}:fontcolor=white:fontsize={fontsize}:"
-                        f"line_spacing={line_spacing}:shadowcolor=0x000000:shadowx=3:shadowy=3:"
-                        f"text_shaping=1:box=1:boxcolor=0x000000{box_opacity}:boxborderw={boxborderw}:"
-                        f"x=(w-text_w)/2:y={y_expr}:fix_bounds=1:borderw=0:"
-                        f"enable='lt(t,{cta_start})'"
-                        f"[v2]"
-                    )
-                else:
-                    vf += ";[v1]copy[v2]"
-
-                # ---------------------------------------------------------
-                # (2) BLUR UNDER CTA — but NEVER make video black
-                #     boxblur with enable=... passes input when false
-                # ---------------------------------------------------------
-                vf += (
-                    f";[v2]split[v2a][v2b];"
-                    f"[v2a]boxblur=12:1[v2blur];"
-                    f"[v2b][v2blur]overlay=0:0:enable='gte(t,{cta_start})'[v3]"
+        is_last = clip.get("is_last", False)
 
-                )
-
-                # ---------------------------------------------------------
-                # (3) CTA TEXT — only after CTA start
-                # ---------------------------------------------------------
-                if layout_mode == "tiktok":
-                    cta_y_expr = "(h * 0.70)"
-                else:
-                    cta_y_expr = "(h * 0.72)"   # safe for classic layout – always visible
+        # ----- NON-LAST CLIPS: normal caption -----
+        if not is_last or not (cta_enabled and raw_cta_text and last_clip_cta_start_rel is not None and cta_textfile):
+            if clip["text"]:
+                textfile = _caption_textfile(_wrap_caption(clip["text"], max_chars_per_line=max_chars))
+                vf += f";[v1_{i}]drawtext=textfile='{textfile}':{caption_style}[v{i}]"
+            else:
+                vf += f";[v1_{i}]copy[v{i}]"
 
+        # ----- LAST CLIP: caption first, then CTA at the end -----
+        else:
+            cta_start = last_clip_cta_start_rel
 
+            # ---------------------------------------------------------
+            # (1) CAPTION PHASE — draw until CTA start
+            # ---------------------------------------------------------
+            if clip["text"]:
+                textfile = _caption_textfile(_wrap_caption(clip["text"], max_chars_per_line=max_chars))
                 vf += (
-                    f";[v3]drawtext=text='{cta_text_safe}':"
-                    f"fontfile={fontfile}:fontcolor=white:fontsize={fontsize}:"
-                    f"line_spacing={line_spacing}:shadowcolor=0x000000AA:shadowx=3:shadowy=3:"
-                    f"text_shaping=1:box=1:boxcolor=0x000000CC:boxborderw={boxborderw}:"
-                    f"x=(w-text_w)/2:y={cta_y_expr}:fix_bounds=1:borderw=0:"
-                    f"enable='gte(t,{cta_start})'"
-                    f"[outv]"
-                )
-
-                log_step(
-                    f"[CTA-LAST-CLIP-SIMPLE] caption→CTA, start={cta_start:.2f}"
+                    f";[v1_{i}]drawtext=textfile='{textfile}':{caption_style}:"
+                    f"enable='lt(t,{cta_start})'"
+                    f"[v2_{i}]"
                 )
+            else:
+                vf += f";[v1_{i}]copy[v2_{i}]"
+
+            # ---------------------------------------------------------
+            # (2) BLUR UNDER CTA — but NEVER make video black
+            #     gblur with enable=... passes input when false, so
+            #     frames before the CTA are not blurred at all
+            # ---------------------------------------------------------
+            vf += (
+                f";[v2_{i}]gblur=sigma=7:steps=2:enable='gte(t,{cta_start})'[v3_{i}]"
+            )
 
-            trim_cmd = [
-                "ffmpeg", "-y",
-                "-ss", str(clip["start"]),
-                "-i", clip["file"],
-                "-t", str(clip["duration"]),
-                "-filter_complex", vf,
-                "-map", "[outv]",
-                "-c:v", "libx264",
-                "-preset", "veryfast",
-                "-crf", "20",
-                "-an",
-                trimmed_path,
-            ]
-
-            log_step(f"[TRIM] {clip['file']} -> {trimmed_path}")
-            proc = subprocess.run(trim_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            if proc.stderr:
-                log_step(f"[TRIM-FFMPEG] stderr for {clip['file']}:\n{proc.stderr}")
-
-            if not os.path.exists(trimmed_path):
-                raise RuntimeError(f"[TRIM ERROR] Output not created for {clip['file']}")
-
-            trimmed_files.append(trimmed_path)
-            lf.write(f"file '{trimmed_path}'\n")
-
-    # -------------------------------
-    # 2. CONCAT CLIPS
-    # -------------------------------
-
-    log_step("[CONCAT] Using standard concat")
-
-    concat_output = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4").name
-    concat_cmd = [
-        "ffmpeg", "-y",
-        "-f", "concat", "-safe", "0",
-        "-i", trimlist,
-        "-c:v", "libx264",
-        "-preset", "superfast" if optimized else "veryfast",
-        "-crf", "22",
-        "-pix_fmt", "yuv420p",
-        concat_output,
-    ]
+            # ---------------------------------------------------------
+            # (3) CTA TEXT — only after CTA start
+            # ---------------------------------------------------------
+            if layout_mode == "tiktok":
+                cta_y_expr = "(h * 0.70)"
+            else:
+                cta_y_expr = "(h * 0.72)"   # safe for classic layout – always visible
+
+            vf += (
+                f";[v3_{i}]drawtext=textfile='{cta_textfile}':expansion=none:"
+                f"fontfile={fontfile}:fontcolor=white:fontsize={fontsize}:"
+                f"line_spacing={line_spacing}:shadowcolor=0x000000AA:shadowx=3:shadowy=3:"
+                f"text_shaping=1:box=1:boxcolor=0x000000CC:boxborderw={boxborderw}:"
+                f"x=(w-text_w)/2:y={cta_y_expr}:fix_bounds=1:borderw=0:"
+                f"enable='gte(t,{cta_start})'"
+                f"[v{i}]"
+            )
 
-    proc = subprocess.run(concat_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if proc.stderr:
-        log_step(f"[CONCAT-FFMPEG] stderr:\n{proc.stderr}")
+            log_step(
+                f"[CTA-LAST-CLIP-SIMPLE] caption→CTA, start={cta_start:.2f}"
+            )
 
-    final_video_source = concat_output
+        filter_parts.append(vf)
+        segment_labels.append(f"[v{i}]")
 
-    # ✅ always compute duration
-    total_video_duration = get_video_duration(final_video_source) or float(base_video_duration)
-    log_step(f"[DURATION] total_video_duration={total_video_duration:.2f}s")
+    # Every segment is exactly its clip duration (see tpad/trim above)
+    total_video_duration = float(base_video_duration)
 
 
     # ------------------------------------------------------------------
-    # 4. AUDIO PIPELINE — CLEAN, NO OVERLAP, ACCURATE TTS TIMELINE
+    # 2. AUDIO PIPELINE — CLEAN, NO OVERLAP, ACCURATE TTS TIMELINE
     # ------------------------------------------------------------------
     log_step("[AUDIO] Building audio timeline…")
 
-    # Background music
-    music_cfg = cfg.get("music", {}) or {}
-    music_audio = None
-
-    if music_cfg.get("enabled"):
-        music_audio = _build_music_audio(cfg, total_video_duration)
-
-    if music_audio:
-        log_step(f"[AUDIO-MUSIC] Adding background music: {music_audio}")
-    else:
-        log_step("[AUDIO-MUSIC] No music added.")
-
     audio_inputs = []
 
-    if music_audio:
-        audio_inputs.append({
-            "path": music_audio,
-            "start": 0.0,
-            "volume": float(music_cfg.get("volume", 0.25)),
-        })
-
     FIRST_TTS_DELAY = 0.05
     last_tts_end = 0.0
 
@@ -956,6 +1423,7 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
                 "start": cta_start_abs,
                 "volume": 1.0,
             })
+            last_tts_end = max(last_tts_end, cta_start_abs + float(cta_dur or 0.0))
 
             log_step(
                 f"[CTA-AUDIO] last_clip_start_abs={last_clip_start_abs:.2f}, "
@@ -963,101 +1431,153 @@ def edit_video(session_id: str, output_file: str = "output_tiktok_final.mp4", op
                 f"visual_rel={last_clip_cta_start_rel:.2f}"
             )
 
-    # ------------------------------------------------------------------
-    # MIX ALL AUDIO
-    # ------------------------------------------------------------------
-    final_audio = None
-    if audio_inputs:
-        narration_out = tempfile.NamedTemporaryFile(delete=False, suffix=".m4a").name
+    # Narration running past the last frame: hold that frame in the same
+    # graph (tpad on the concat output) instead of a separate pad encode.
+    pad_len = max(0.0, last_tts_end - total_video_duration)
+    pad_filter = ""
+    if pad_len > 0.01:
+        pad_filter = f",tpad=stop_mode=clone:stop_duration={pad_len:.3f}"
+        total_video_duration += pad_len
+        log_step(f"[FINAL PAD] Holding last frame {pad_len:.2f}s for narration")
+
+    # the encoder's pixel-format tail and [outv] are appended per render attempt
+    concat_part = "".join(segment_labels) + f"concat=n={len(clips)}:v=1:a=0{pad_filter}"
+    log_step(f"[DURATION] total_video_duration={total_video_duration:.2f}s")
 
-        cmd = ["ffmpeg", "-y"]
+    # Background music, trimmed to the final (padded) length
+    music_cfg = cfg.get("music", {}) or {}
+    music_audio = None
 
-        for inp in audio_inputs:
-            cmd += ["-i", inp["path"]]
+    if music_cfg.get("enabled"):
+        music_audio = _music_source(cfg)
 
-        filter_parts = []
-        mix_labels = []
+    # Narration entries were scheduled in time order and never overlap
+    narration_inputs = audio_inputs
+    audio_inputs = list(narration_inputs)
 
-        for idx, inp in enumerate(audio_inputs):
-            delay_ms = int(round(inp["start"] * 1000))
-            filter_parts.append(
-                f"[{idx}:a]adelay={delay_ms}|{delay_ms},volume={inp['volume']}[a{idx}]"
-            )
-            mix_labels.append(f"[a{idx}]")
+    if music_audio:
+        log_step(f"[AUDIO-MUSIC] Adding background music: {music_audio}")
+        audio_inputs.insert(0, {
+            "path": music_audio,
+            "start": 0.0,
+            "volume": float(music_cfg.get("volume", 0.25)),
+        })
+    else:
+        log_step("[AUDIO-MUSIC] No music added.")
 
-        full_filter = (
-            "; ".join(filter_parts)
-            + "; "
-            + "".join(mix_labels)
-            + f"amix=inputs={len(audio_inputs)}:normalize=0[outa]"
+    # Audio inputs follow the clip inputs in the same ffmpeg call
+    audio_input_args: List[str] = []
+    audio_parts: List[str] = []
+    for inp in audio_inputs:
+        audio_input_args += ["-i", inp["path"]]
+
+    # Optional loudness levelling: one dynaudnorm on the mixed bus (the
+    # sum from amix normalize=0 can otherwise clip where TTS meets music).
+    # Off by default so existing renders keep their loudness.
+    normalize_audio = bool(render_cfg.get("normalize_audio", False))
+    bus_label = "[bus]" if normalize_audio else "[outa]"
+
+    # Narration: each segment is padded with silence up to the next one's
+    # start and the segments are concatenated into one stream, so the mix
+    # below is at most 2-way (music + narration) instead of N-way.
+    first_narr = len(clips) + (1 if music_audio else 0)
+    narr_label = bus_label if not music_audio else "[narr]"
+    seg_labels: List[str] = []
+    for k, inp in enumerate(narration_inputs):
+        seg_begin = 0.0 if k == 0 else inp["start"]
+        chain = []
+        lead_ms = int(round((inp["start"] - seg_begin) * 1000))
+        if lead_ms:
+            chain.append(f"adelay={lead_ms}|{lead_ms}")
+        if k + 1 < len(narration_inputs):
+            # pad only — a narration longer than its slot pushes the next
+            # one back rather than being cut off
+            chain.append(f"apad=whole_dur={narration_inputs[k + 1]['start'] - seg_begin:.3f}")
+        if float(inp["volume"]) != 1.0:
+            chain.append(f"volume={inp['volume']}")
+        label = narr_label if len(narration_inputs) == 1 else f"[n{k}]"
+        audio_parts.append(f"[{first_narr + k}:a]{','.join(chain) or 'anull'}{label}")
+        seg_labels.append(label)
+
+    if len(narration_inputs) > 1:
+        audio_parts.append(
+            "".join(seg_labels)
+            + f"concat=n={len(narration_inputs)}:v=0:a=1{narr_label}"
         )
 
-        cmd += [
-            "-filter_complex", full_filter,
-            "-map", "[outa]",
-            "-c:a", "aac",
-            narration_out,
-        ]
-
-        log_step("[AUDIO] Mixing audio tracks…")
-        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-        if proc.stderr:
-            log_step(f"[AUDIO-FFMPEG] stderr:\n{proc.stderr}")
+    if music_audio:
+        music_label = "[mus]" if narration_inputs else bus_label
+        # Padded with silence / cut to the timeline in the graph (no prep
+        # encode). The gain is the volume squared on purpose: music used to
+        # be volume-scaled once when prepped and again in the mix, and
+        # existing configs are tuned to that loudness.
+        music_gain = audio_inputs[0]["volume"] ** 2
+        audio_parts.append(
+            f"[{len(clips)}:a]apad,atrim=0:{total_video_duration:.3f},"
+            f"volume={music_gain:.6g}{music_label}"
+        )
+        if narration_inputs:
+            audio_parts.append(f"[mus][narr]amix=inputs=2:normalize=0{bus_label}")
 
-        if os.path.exists(narration_out) and os.path.getsize(narration_out) > 1024:
-            final_audio = narration_out
-        else:
-            log_step("[AUDIO] Mix invalid, skipping narration.")
-            final_audio = None
+    if normalize_audio and audio_parts:
+        audio_parts.append(f"{bus_label}dynaudnorm=f=500:g=15[outa]")
 
     # -------------------------------
-    # 6. FINAL MUX
+    # 3. SINGLE ENCODE (trim + captions + concat + audio mix + mux)
     # -------------------------------
     final_output = os.path.abspath(os.path.join(BASE_DIR, output_file))
 
-    actual_final_video_duration = get_video_duration(final_video_source)
-    if actual_final_video_duration is None:
-        log_step("[MUX-WARNING] Could not probe video duration, using fallback = total_video_duration")
-        actual_final_video_duration = total_video_duration
-    else:
-        total_video_duration = actual_final_video_duration
-
-    use_shortest = False
-    if final_audio and actual_final_video_duration < (total_video_duration - 0.75):
-        log_step(
-            f"[MUX-SAFETY] Video ({actual_final_video_duration:.2f}s) shorter than "
-            f"expected total ({total_video_duration:.2f}s). Enforcing -shortest."
-        )
-        use_shortest = True
-
-    mux_cmd = ["ffmpeg", "-y"]
-    mux_cmd += ["-i", final_video_source]
-
-    if final_audio:
-        mux_cmd += ["-i", final_audio]
-        mux_cmd += [
-            "-map", "0:v:0",
-            "-map", "1:a:0",
-            "-c:v", "copy",
-            "-c:a", "aac",
+    def build_render_cmd(enc: str, with_audio: bool) -> List[str]:
+        graph = [*filter_parts, concat_part + _encoder_pixel_filter(enc) + "[outv]"]
+        if with_audio:
+            graph += audio_parts
+        cmd = [FFMPEG, *FFMPEG_QUIET, "-y", *_encoder_device_args(enc)]
+        for args in clip_input_args:
+            cmd += [*_encoder_decode_args(enc), *args]
+        cmd += [
+            *(audio_input_args if with_audio else []),
+            "-filter_complex", ";".join(graph),
+            "-map", "[outv]",
         ]
-        if use_shortest:
-            mux_cmd.append("-shortest")
-        mux_cmd.append(final_output)
-    else:
-        mux_cmd += [
-            "-c:v", "copy",
+        if with_audio:
+            cmd += ["-map", "[outa]", *AAC_ENCODE_ARGS]
+        cmd += [
+            *_video_encoder_args(enc, optimized),
+            # moov up front so the export starts playing before it is fully downloaded
+            "-movflags", "+faststart",
             final_output,
         ]
+        return cmd
 
-    log_step("[MUX] Running final mux command…")
-    mux_proc = subprocess.run(mux_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if mux_proc.stderr:
-        log_step(f"[MUX-FFMPEG] stderr:\n{mux_proc.stderr}")
-
-    if not os.path.exists(final_output) or os.path.getsize(final_output) < 200_000:
-        raise RuntimeError(f"[MUX ERROR] Final output invalid or missing! ({final_output})")
+    with_audio = bool(audio_inputs)
+    log_step(
+        f"[RENDER] Rendering {len(clips)} clip(s) + {len(audio_inputs)} audio track(s) "
+        f"in one ffmpeg pass"
+    )
+    proc = _run_ffmpeg(build_render_cmd(video_encoder, with_audio), "RENDER")
+
+    if proc.returncode != 0 and video_encoder != "libx264":
+        # Hardware encoders can fail at render time even after the trial
+        # (session limit, device busy): retry this render in software
+        log_step(f"[ENCODER] {video_encoder} failed at render time → retrying with libx264")
+        video_encoder = "libx264"
+        proc = _run_ffmpeg(build_render_cmd(video_encoder, with_audio), "RENDER")
+
+    if proc.returncode != 0 and with_audio:
+        # A broken narration/music file must not cost the whole video
+        log_step("[AUDIO] Mix invalid, rendering without narration.")
+        proc = _run_ffmpeg(build_render_cmd(video_encoder, False), "RENDER")
+
+    if proc.returncode != 0 or _file_size_or_zero(final_output) < 200_000:
+        raise RuntimeError(f"[RENDER ERROR] Final output invalid or missing! ({final_output})")
+
+    # One verification read of the finished file (mvhd, no ffprobe spawn)
+    final_duration = _mp4_duration(final_output)
+    if final_duration is not None:
+        log_step(
+            f"[DURATION] final={final_duration:.2f}s "
+            f"(timeline={total_video_duration:.2f}s)"
+        )
 
     log_step(f"[EXPORT] Video rendered OK → {final_output}")
     return final_output
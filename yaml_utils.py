@@ -0,0 +1,30 @@
+# yaml_utils.py
+#
+# Safe YAML load/dump shared by every module. No side effects on import
+# (no env checks, no folders), so any module can use it.
+
+import logging
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# libyaml's C loader/dumper when PyYAML was built with it, pure-python otherwise
+try:
+    from yaml import CSafeLoader as _YAML_LOADER, CSafeDumper as _YAML_DUMPER
+except ImportError:
+    from yaml import SafeLoader as _YAML_LOADER, SafeDumper as _YAML_DUMPER
+    logger.warning(
+        "[CONFIG] PyYAML has no libyaml bindings — using the slower pure-python "
+        "loader (install libyaml-dev and reinstall pyyaml to fix)"
+    )
+
+
+def yaml_safe_load(stream):
+    """yaml.safe_load equivalent that uses libyaml's CSafeLoader when available."""
+    return yaml.load(stream, Loader=_YAML_LOADER)
+
+
+def yaml_safe_dump(data, stream=None, **kwargs):
+    """yaml.safe_dump equivalent that uses libyaml's CSafeDumper when available."""
+    return yaml.dump(data, stream, Dumper=_YAML_DUMPER, **kwargs)